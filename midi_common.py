@@ -0,0 +1,64 @@
+"""
+Shared helpers for the GenerativeGenerator MIDI test scripts
+Deadline waiting, background console logging and cached port enumeration
+"""
+
+import functools
+import queue
+import sys
+import threading
+import time
+import mido
+
+# Final stretch before a deadline is spun rather than slept; time.sleep()
+# routinely overshoots by around a millisecond.
+SPIN_MARGIN = 0.002
+
+def wait_until(deadline):
+    """Block until time.perf_counter() reaches deadline"""
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_MARGIN:
+        time.sleep(remaining - SPIN_MARGIN)
+    while time.perf_counter() < deadline:
+        pass
+
+# Console output is written by a daemon thread so a slow terminal never
+# delays sending or handling MIDI. The thread starts on the first log().
+# Call flush_log() before mixing in plain print()s.
+_log_queue = queue.Queue()
+_log_thread = None
+_log_thread_lock = threading.Lock()
+
+def _log_writer():
+    while True:
+        line = _log_queue.get()
+        try:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+        except (OSError, ValueError):
+            pass  # stdout closed (e.g. piped into head); drop the line
+        _log_queue.task_done()
+
+def log(line):
+    """Queue a line for the background writer"""
+    global _log_thread
+    if _log_thread is None:
+        with _log_thread_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_log_writer, daemon=True)
+                _log_thread.start()
+    _log_queue.put_nowait(line + "\n")
+
+def flush_log():
+    """Wait until every queued line has been written"""
+    _log_queue.join()
+
+@functools.lru_cache(maxsize=1)
+def output_names():
+    """MIDI output port names, enumerated once per run (a slow OS-level scan)"""
+    return tuple(mido.get_output_names())
+
+@functools.lru_cache(maxsize=1)
+def input_names():
+    """MIDI input port names, enumerated once per run (a slow OS-level scan)"""
+    return tuple(mido.get_input_names())
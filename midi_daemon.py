@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+MIDI Daemon for GenerativeGenerator
+Keeps a MIDI output port open and runs test_midi_cc.py interactive commands
+received over a Unix domain socket, so one-shot commands skip port setup
+"""
+
+import argparse
+import os
+import socket
+import stat
+import mido
+import test_midi_cc
+
+# Per-user runtime directory when available; otherwise a per-user name in
+# /tmp. The socket itself is always created owner-only (0600).
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get('XDG_RUNTIME_DIR') or '/tmp',
+    f'generativegenerator-midi-{os.getuid()}.sock'
+)
+
+def daemon_running(socket_path):
+    """True if something is already accepting connections on socket_path"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+def serve(port_name, socket_path):
+    """
+    Hold port_name open and execute commands from socket clients
+
+    Each client sends one command per line (same syntax as
+    test_midi_cc.py --interactive) and gets 'ok' or 'error: ...' back per
+    line. Command output is printed on the daemon's console. 'quit' stops
+    the daemon.
+    """
+    if os.path.lexists(socket_path):
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            print(f"Error: '{socket_path}' exists and is not a socket")
+            return False
+        if daemon_running(socket_path):
+            print(f"Error: A daemon is already listening on '{socket_path}'")
+            return False
+        os.unlink(socket_path)  # Stale socket from a daemon that died
+
+    with mido.open_output(port_name) as port, \
+            socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Other local users must not be able to send CCs or stop the daemon
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen()
+        print(f"Connected to: {port_name}")
+        print(f"Listening on: {socket_path}")
+        print("Press Ctrl+C to stop\n")
+
+        running = True
+        try:
+            while running:
+                conn, _ = server.accept()
+                # A misbehaving client (hung up early, bad bytes) only ends
+                # its own connection, never the daemon
+                try:
+                    with conn, conn.makefile('rb') as lines:
+                        for line in lines:
+                            try:
+                                command = line.decode(errors='replace')
+                                running = test_midi_cc.run_command(port, command)
+                                reply = "ok"
+                            except (ValueError, KeyError) as e:
+                                reply = f"error: {e}"
+                            conn.sendall((reply + "\n").encode())
+                            if not running:
+                                break
+                except OSError as e:
+                    print(f"Client disconnected: {e}")
+        except KeyboardInterrupt:
+            print("\nStopping daemon...")
+        finally:
+            os.unlink(socket_path)
+
+    return True
+
+def send_command(command, socket_path):
+    """Send one command to a running daemon and print its reply"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall((command + "\n").encode())
+            client.shutdown(socket.SHUT_WR)
+            with client.makefile('r') as reply:
+                print(reply.read(), end='')
+    except OSError as e:
+        print(f"Error: Could not reach daemon at '{socket_path}'")
+        print(f"Details: {e}")
+        return False
+
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent MIDI CC port for GenerativeGenerator')
+    parser.add_argument('-l', '--list', action='store_true', help='List available MIDI ports')
+    parser.add_argument('-p', '--port', type=str, help='MIDI port name (or index)')
+    parser.add_argument('--socket', type=str, default=DEFAULT_SOCKET,
+                       help=f'Unix socket path (default: {DEFAULT_SOCKET})')
+    parser.add_argument('--send', type=str, nargs='+', metavar='WORD',
+                       help="Send a command to a running daemon (e.g. --send preset smooth)")
+
+    args = parser.parse_args()
+
+    # List ports
+    if args.list:
+        test_midi_cc.list_midi_ports()
+        return
+
+    # Client
+    if args.send:
+        send_command(' '.join(args.send), args.socket)
+        return
+
+    # Server
+    port_name = test_midi_cc.resolve_port_name(args.port)
+    if port_name is None:
+        return
+    serve(port_name, args.socket)
+
+if __name__ == '__main__':
+    main()
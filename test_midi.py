@@ -7,14 +7,100 @@ Sends test MIDI sequences to verify learning buffer functionality
 import mido
 import time
 import argparse
+import functools
+import heapq
+import itertools
+import re
+import select
+import socket
+import threading
+from midi_common import log, flush_log, wait_until, output_names
+
+class NoteScheduler:
+    """
+    Single background thread running MIDI sends at absolute deadlines
+
+    Producers push (deadline, action) onto a heap and poke a socketpair; the
+    thread sleeps in select() until the earliest deadline or the next push.
+    Deadlines are time.perf_counter() values.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._lock = threading.Lock()
+        self._order = itertools.count()  # Tie-breaker so actions are never compared
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def at(self, deadline, action):
+        """Call action() on the scheduler thread at deadline"""
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, next(self._order), action))
+        self._wake_w.send(b'x')
+
+    def close(self):
+        """Run everything still queued (e.g. pending Note Offs), then stop"""
+        self._running = False
+        self._wake_w.send(b'x')
+        self._thread.join()
+        self._wake_r.close()
+        self._wake_w.close()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._heap and not self._running:
+                    return
+                timeout = self._heap[0][0] - time.perf_counter() if self._heap else None
+
+            if timeout is None or timeout > 0:
+                select.select([self._wake_r], [], [], timeout)
+                try:
+                    while self._wake_r.recv(64):
+                        pass
+                except BlockingIOError:
+                    pass
+
+            now = time.perf_counter()
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+            for action in due:
+                # A failed send must not kill the thread, or every later
+                # action (including Note Offs) would silently never run
+                try:
+                    action()
+                except Exception as e:
+                    log(f"Warning: scheduled MIDI send failed: {e}")
+
+# Plain ASCII note numbers, optionally signed
+NUMBER_RE = re.compile(r'[+-]?[0-9]+')
+
+# Note names like C4, D#5 or Bb-1 (C4 = 60)
+NOTE_RE = re.compile(r'^([A-Ga-g])([#b]?)(-?[0-9]+)$')
+PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+ACCIDENTALS = {'': 0, '#': 1, 'b': -1}
+
+def parse_note(token):
+    """Parse a MIDI note number or note name, returning None if neither"""
+    if NUMBER_RE.fullmatch(token):
+        return int(token)
+    m = NOTE_RE.match(token)
+    if m:
+        return PITCH_CLASSES[m[1].upper()] + ACCIDENTALS[m[2]] + (int(m[3]) + 1) * 12
+    return None
 
 def list_midi_ports():
     """List available MIDI output ports"""
     print("Available MIDI output ports:")
-    for i, port in enumerate(mido.get_output_names()):
+    for i, port in enumerate(output_names()):
         print(f"  {i}: {port}")
 
-def send_note_sequence(port_name, notes, note_duration=0.5, gap_duration=0.1):
+def send_note_sequence(port_name, notes, note_duration=0.5, gap_duration=0.1, quiet=False):
     """
     Send a sequence of MIDI notes
 
@@ -23,26 +109,48 @@ def send_note_sequence(port_name, notes, note_duration=0.5, gap_duration=0.1):
         notes: List of MIDI note numbers (0-127)
         note_duration: Duration of each note in seconds
         gap_duration: Gap between notes in seconds
+        quiet: Skip per-note output (and the formatting work behind it)
     """
     try:
         with mido.open_output(port_name) as port:
             print(f"Connected to: {port_name}")
             print(f"Sending {len(notes)} notes: {notes}")
 
-            for i, note in enumerate(notes):
-                # Send Note On
-                msg = mido.Message('note_on', note=note, velocity=100)
-                port.send(msg)
-                print(f"  {i+1}. Note On: {note}")
+            # Messages and log lines are built up front so the timing loop
+            # only waits, sends and queues output.
+            on_msgs = [mido.Message('note_on', note=n, velocity=100) for n in notes]
+            off_msgs = [mido.Message('note_off', note=n, velocity=0) for n in notes]
 
-                time.sleep(note_duration)
+            # Absolute schedule of (offset from start, message, log line). Sleeping
+            # towards fixed deadlines keeps send/print latency from
+            # accumulating into rhythm drift. Offsets never decrease, and each
+            # Note Off precedes the next Note On even with a zero gap.
+            step = note_duration + gap_duration
+            schedule = []
+            for i, note in enumerate(notes):
+                on_line = off_line = None
+                if not quiet:
+                    on_line = f"  {i+1}. Note On: {note}"
+                    off_line = f"     Note Off: {note}"
+                schedule.append((i * step, on_msgs[i], on_line))
+                schedule.append((i * step + note_duration, off_msgs[i], off_line))
 
-                # Send Note Off
-                msg = mido.Message('note_off', note=note, velocity=0)
-                port.send(msg)
-                print(f"     Note Off: {note}")
+            # The quiet check is hoisted out of the timing loop
+            send = port.send
+            t0 = time.perf_counter()
+            if quiet:
+                for offset, msg, _ in schedule:
+                    wait_until(t0 + offset)
+                    send(msg)
+            else:
+                for offset, msg, line in schedule:
+                    wait_until(t0 + offset)
+                    send(msg)
+                    log(line)
 
-                time.sleep(gap_duration)
+            # Trailing gap after the last Note Off
+            wait_until(t0 + len(notes) * step)
+            flush_log()
 
             print(f"\nSequence complete! Sent {len(notes)} notes.")
             print("Waiting 2.5s for learning timeout...")
@@ -56,7 +164,29 @@ def send_note_sequence(port_name, notes, note_duration=0.5, gap_duration=0.1):
 
     return True
 
-def run_test_sequence(port_name, test_name="basic"):
+def send_chord(port, notes, velocity=100):
+    """
+    Send Note Ons for all notes back-to-back
+
+    Each note is a pre-encoded 3-byte Note On handed straight to rtmidi, so
+    the whole chord goes out in one tight loop with no mido Message
+    construction between notes. (rtmidi only accepts single short messages,
+    so MIDI running status can't be used.) Velocity 0 releases the chord
+    (Note On with velocity 0 = Note Off).
+    """
+    rt = getattr(port, '_rt', None)
+    if rt is None:
+        # Not an rtmidi-backed port: fall back to mido messages
+        for note in notes:
+            port.send(mido.Message('note_on', note=note, velocity=velocity))
+        return
+
+    frames = [bytes((0x90, note, velocity)) for note in notes]
+    send = rt.send_message
+    for data in frames:
+        send(data)
+
+def run_test_sequence(port_name, test_name="basic", quiet=False):
     """Run predefined test sequences"""
 
     sequences = {
@@ -97,46 +227,56 @@ def run_test_sequence(port_name, test_name="basic"):
     print(f"Description: {seq['description']}")
     print(f"{'='*60}\n")
 
-    return send_note_sequence(port_name, seq['notes'])
+    return send_note_sequence(port_name, seq['notes'], quiet=quiet)
 
-def interactive_mode(port_name):
+def interactive_mode(port_name, quiet=False):
     """Interactive mode for manual note entry"""
     print("\nInteractive MIDI mode")
     print("Enter MIDI note numbers (0-127) separated by spaces")
     print("Or use note names: C4, D#5, etc.")
+    print("Prefix with 'chord' to play notes together (e.g. 'chord C4 E4 G4')")
     print("Type 'quit' to exit\n")
 
     with mido.open_output(port_name) as port:
-        while True:
-            try:
-                user_input = input("Notes> ").strip()
-                if user_input.lower() in ['quit', 'exit', 'q']:
-                    break
+        # Chords are played by one scheduler thread so the prompt returns while
+        # they sound, and only that thread sends on the port
+        scheduler = NoteScheduler()
+        try:
+            while True:
+                try:
+                    user_input = input("Notes> ").strip()
+                    if user_input.lower() in ['quit', 'exit', 'q']:
+                        break
 
-                # Parse input (numbers or note names)
-                notes = []
-                for item in user_input.split():
-                    try:
-                        # Try parsing as number first
-                        note = int(item)
-                        if 0 <= note <= 127:
+                    chord = user_input.lower().startswith('chord ')
+                    if chord:
+                        user_input = user_input[len('chord '):]
+
+                    # Parse input (numbers or note names)
+                    notes = []
+                    for item in user_input.split():
+                        note = parse_note(item)
+                        if note is None:
+                            print(f"Warning: Could not parse '{item}'")
+                        elif 0 <= note <= 127:
                             notes.append(note)
                         else:
                             print(f"Warning: Note {note} out of range (0-127)")
-                    except ValueError:
-                        # Try parsing as note name
-                        try:
-                            note = mido.note_name_to_number(item)
-                            notes.append(note)
-                        except:
-                            print(f"Warning: Could not parse '{item}'")
 
-                if notes:
-                    send_note_sequence(port_name, notes)
+                    if notes and chord:
+                        print(f"Chord: {notes}")
+                        now = time.perf_counter()
+                        scheduler.at(now, functools.partial(send_chord, port, notes))
+                        scheduler.at(now + 0.5, functools.partial(send_chord, port, notes, velocity=0))
+                    elif notes:
+                        send_note_sequence(port_name, notes, quiet=quiet)
 
-            except KeyboardInterrupt:
-                print("\nExiting...")
-                break
+                except KeyboardInterrupt:
+                    print("\nExiting...")
+                    break
+        finally:
+            # Runs pending releases on every exit path (quit, Ctrl+D, errors)
+            scheduler.close()
 
 def main():
     parser = argparse.ArgumentParser(description='MIDI test script for GenerativeGenerator')
@@ -146,6 +286,7 @@ def main():
                        help='Test sequence: basic, pentatonic, octave_leap, chromatic, max_buffer, melodic')
     parser.add_argument('-i', '--interactive', action='store_true', help='Interactive mode')
     parser.add_argument('-n', '--notes', type=int, nargs='+', help='Custom note sequence (space-separated)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Skip per-note output')
 
     args = parser.parse_args()
 
@@ -156,7 +297,7 @@ def main():
 
     # Determine port
     if not args.port:
-        ports = mido.get_output_names()
+        ports = output_names()
         if not ports:
             print("Error: No MIDI output ports found!")
             return
@@ -169,7 +310,7 @@ def main():
         # Check if port is an index or name
         try:
             port_idx = int(args.port)
-            ports = mido.get_output_names()
+            ports = output_names()
             if 0 <= port_idx < len(ports):
                 port_name = ports[port_idx]
             else:
@@ -180,17 +321,17 @@ def main():
 
     # Interactive mode
     if args.interactive:
-        interactive_mode(port_name)
+        interactive_mode(port_name, args.quiet)
         return
 
     # Custom notes
     if args.notes:
         print(f"Sending custom sequence: {args.notes}")
-        send_note_sequence(port_name, args.notes)
+        send_note_sequence(port_name, args.notes, quiet=args.quiet)
         return
 
     # Run test sequence
-    run_test_sequence(port_name, args.test)
+    run_test_sequence(port_name, args.test, args.quiet)
 
 if __name__ == '__main__':
     main()
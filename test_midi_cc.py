@@ -7,143 +7,281 @@ Demonstrates parameter control via MIDI Control Change messages
 import mido
 import time
 import argparse
+from midi_common import log, flush_log, wait_until, output_names
+
+# A 3-byte CC occupies ~1 ms of a 31.25 kbaud DIN MIDI link, so sweeps never
+# schedule messages closer together than this
+MIN_MESSAGE_INTERVAL = 0.001
+
+def raw_sender(port):
+    """
+    Return a function sending pre-encoded MIDI bytes on a mido port
+
+    Uses the underlying rtmidi port directly when available, skipping mido's
+    Message construction and validation.
+    """
+    rt = getattr(port, '_rt', None)
+    if rt is not None:
+        return rt.send_message
+    return lambda data: port.send(mido.Message.from_bytes(data))
+
+def make_cc_sender(port, cc_number, channel=0):
+    """
+    Return a function f(value) sending one CC on a fixed port and controller
+
+    The status and controller bytes are encoded once; each call only patches
+    the value byte, so repeated sends build no Message objects. Out-of-range
+    arguments raise ValueError, as mido would, rather than being wrapped.
+    """
+    if not 0 <= cc_number <= 127:
+        raise ValueError(f"control must be in range 0..127 (got {cc_number})")
+    if not 0 <= channel <= 15:
+        raise ValueError(f"channel must be in range 0..15 (got {channel})")
+    buf = bytearray([0xB0 | channel, cc_number, 0])
+    send = raw_sender(port)
+
+    def send_value(value):
+        if not 0 <= value <= 127:
+            raise ValueError(f"value must be in range 0..127 (got {value})")
+        buf[2] = value
+        send(bytes(buf))
+
+    return send_value
 
 def list_midi_ports():
     """List available MIDI output ports"""
     print("Available MIDI output ports:")
-    for i, port in enumerate(mido.get_output_names()):
+    for i, port in enumerate(output_names()):
         print(f"  {i}: {port}")
 
 def send_cc(port, cc_number, value):
     """Send a MIDI CC message"""
     msg = mido.Message('control_change', control=cc_number, value=value)
     port.send(msg)
-    print(f"  CC {cc_number:3d} = {value:3d} ({value/127.0*100:.1f}%)")
+    log(f"  CC {cc_number:3d} = {value:3d} ({value/127.0*100:.1f}%)")
+
+CC_MAP = {
+    3:  "MOTION",
+    9:  "MEMORY",
+    14: "REGISTER",
+    15: "DIRECTION",
+    20: "PHRASE",
+    21: "ENERGY",
+    22: "STABILITY",
+    23: "FORGETFULNESS",
+    24: "LEAP SHAPE",
+    25: "DIRECTION MEMORY",
+    26: "HOME REGISTER",
+    27: "RANGE WIDTH"
+}
 
-def test_all_parameters(port_name):
+def test_all_parameters(port):
     """Test all 12 parameters by sweeping through values"""
-    cc_map = {
-        3:  "MOTION",
-        9:  "MEMORY",
-        14: "REGISTER",
-        15: "DIRECTION",
-        20: "PHRASE",
-        21: "ENERGY",
-        22: "STABILITY",
-        23: "FORGETFULNESS",
-        24: "LEAP SHAPE",
-        25: "DIRECTION MEMORY",
-        26: "HOME REGISTER",
-        27: "RANGE WIDTH"
-    }
 
-    with mido.open_output(port_name) as port:
-        print(f"Connected to: {port_name}")
-        print("\nTesting all 12 parameters:")
-        print("=" * 60)
-
-        for cc_num, param_name in cc_map.items():
-            print(f"\n{param_name} (CC {cc_num}):")
-            # Set to 0%
-            send_cc(port, cc_num, 0)
-            time.sleep(0.3)
-            # Set to 50%
-            send_cc(port, cc_num, 64)
-            time.sleep(0.3)
-            # Set to 100%
-            send_cc(port, cc_num, 127)
-            time.sleep(0.5)
-
-        print("\n" + "=" * 60)
-        print("Test complete!")
-
-def sweep_parameter(port_name, cc_number, duration=2.0):
-    """Sweep a single parameter from 0% to 100%"""
-    steps = 128
+    # Flat schedule of (message, hold time, log line): 0%, 50% then 100% per
+    # parameter, built up front so the send loop does no lookups or formatting
+    steps = ((0, 0.3), (64, 0.3), (127, 0.5))
+    schedule = []
+    for cc_num, param_name in CC_MAP.items():
+        for value, hold in steps:
+            line = f"  CC {cc_num:3d} = {value:3d} ({value/127.0*100:.1f}%)"
+            if value == 0:
+                line = f"\n{param_name} (CC {cc_num}):\n" + line
+            schedule.append((mido.Message('control_change', control=cc_num, value=value), hold, line))
+
+    print("\nTesting all 12 parameters:")
+    print("=" * 60)
+
+    send = port.send
+    deadline = time.perf_counter()
+    for msg, hold, line in schedule:
+        send(msg)
+        log(line)
+        deadline += hold
+        wait_until(deadline)
+
+    flush_log()
+    print("\n" + "=" * 60)
+    print("Test complete!")
+
+def sweep_parameter(port, cc_number, duration=2.0, hires=False):
+    """
+    Sweep a single parameter from 0% to 100%
+
+    Args:
+        port: Open MIDI output port
+        cc_number: CC to sweep
+        duration: Sweep duration in seconds
+        hires: Send 14-bit values (MSB on cc_number, LSB on cc_number + 32)
+    """
+    if hires and not 0 <= cc_number < 32:
+        print(f"Error: 14-bit sweep needs CC 0-31 (got CC {cc_number})")
+        return
+
+    top = 16383 if hires else 127
+    messages_per_step = 2 if hires else 1
+
+    # Short sweeps are thinned out to as many steps as the link can carry
+    # instead of pretending to send every value
+    max_steps = int(duration / (MIN_MESSAGE_INTERVAL * messages_per_step))
+    steps = max(2, min(top + 1, max_steps))
     delay = duration / steps
+    values = [round(i * top / (steps - 1)) for i in range(steps)]
 
-    with mido.open_output(port_name) as port:
-        print(f"Connected to: {port_name}")
-        print(f"Sweeping CC {cc_number} from 0 to 127 over {duration:.1f} seconds...")
+    lines = [f"  CC {cc_number:3d} = {v:{5 if hires else 3}d} ({v/top*100:.1f}%)" for v in values]
+
+    # Built before announcing the sweep so a bad CC number fails up front
+    send_msb = make_cc_sender(port, cc_number)
+    send_lsb = make_cc_sender(port, cc_number + 32) if hires else None
 
-        for value in range(steps):
-            send_cc(port, cc_number, value)
-            time.sleep(delay)
+    print(f"Sweeping CC {cc_number} from 0 to {top} over {duration:.1f} seconds "
+          f"({steps} steps)...")
+    t0 = time.perf_counter()
+    for i, value in enumerate(values):
+        wait_until(t0 + i * delay)
+        if hires:
+            send_msb(value >> 7)
+            send_lsb(value & 0x7F)
+        else:
+            send_msb(value)
+        log(lines[i])
+    wait_until(t0 + steps * delay)
+    flush_log()
 
-        print("Sweep complete!")
+    print("Sweep complete!")
 
-def set_parameters(port_name, cc_values):
+def set_parameters(port, cc_values):
     """Set multiple parameters to specific values"""
-    with mido.open_output(port_name) as port:
-        print(f"Connected to: {port_name}")
-        print("Setting parameters:")
+    print("Setting parameters:")
 
-        for cc_num, value in cc_values.items():
-            send_cc(port, cc_num, value)
-            time.sleep(0.1)
+    for cc_num, value in cc_values.items():
+        send_cc(port, cc_num, value)
+        time.sleep(0.1)
 
-        print("Done!")
+    flush_log()
+    print("Done!")
 
-def performance_preset(port_name, preset_name):
-    """Load a performance preset (predefined parameter sets)"""
-    presets = {
-        "default": {
-            3: 64, 9: 64, 14: 64, 15: 64,
-            20: 64, 21: 64, 22: 64, 23: 64,
-            24: 64, 25: 64, 26: 64, 27: 64
-        },
-        "smooth": {
-            3: 10,   # Low MOTION (stepwise)
-            9: 90,   # High MEMORY (repetitive)
-            14: 20,  # Low REGISTER (stay in range)
-            15: 64,  # Neutral DIRECTION
-            20: 90,  # Long PHRASE
-            21: 30,  # Low ENERGY (calm)
-            22: 80,  # High STABILITY
-            23: 20,  # Low FORGETFULNESS
-            24: 40, 25: 80, 26: 64, 27: 50
-        },
-        "chaotic": {
-            3: 110,  # High MOTION (leaps)
-            9: 20,   # Low MEMORY (novelty)
-            14: 100, # High REGISTER (octave jumps)
-            15: 64,  # Neutral DIRECTION
-            20: 30,  # Short PHRASE
-            21: 110, # High ENERGY (intense)
-            22: 20,  # Low STABILITY
-            23: 100, # High FORGETFULNESS
-            24: 80, 25: 30, 26: 64, 27: 100
-        },
-        "ascending": {
-            3: 50, 9: 50, 14: 50,
-            15: 127,  # Max DIRECTION (ascending)
-            20: 80, 21: 70, 22: 64, 23: 40,
-            24: 50, 25: 90, 26: 64, 27: 60
-        },
-        "descending": {
-            3: 50, 9: 50, 14: 50,
-            15: 0,    # Min DIRECTION (descending)
-            20: 80, 21: 70, 22: 64, 23: 40,
-            24: 50, 25: 90, 26: 64, 27: 60
-        },
-        "energetic": {
-            3: 90, 9: 40, 14: 80, 15: 64,
-            20: 40,
-            21: 127,  # Max ENERGY
-            22: 50, 23: 60,
-            24: 70, 25: 50, 26: 64, 27: 90
-        }
+# Performance presets (predefined parameter sets)
+PRESETS = {
+    "default": {
+        3: 64, 9: 64, 14: 64, 15: 64,
+        20: 64, 21: 64, 22: 64, 23: 64,
+        24: 64, 25: 64, 26: 64, 27: 64
+    },
+    "smooth": {
+        3: 10,   # Low MOTION (stepwise)
+        9: 90,   # High MEMORY (repetitive)
+        14: 20,  # Low REGISTER (stay in range)
+        15: 64,  # Neutral DIRECTION
+        20: 90,  # Long PHRASE
+        21: 30,  # Low ENERGY (calm)
+        22: 80,  # High STABILITY
+        23: 20,  # Low FORGETFULNESS
+        24: 40, 25: 80, 26: 64, 27: 50
+    },
+    "chaotic": {
+        3: 110,  # High MOTION (leaps)
+        9: 20,   # Low MEMORY (novelty)
+        14: 100, # High REGISTER (octave jumps)
+        15: 64,  # Neutral DIRECTION
+        20: 30,  # Short PHRASE
+        21: 110, # High ENERGY (intense)
+        22: 20,  # Low STABILITY
+        23: 100, # High FORGETFULNESS
+        24: 80, 25: 30, 26: 64, 27: 100
+    },
+    "ascending": {
+        3: 50, 9: 50, 14: 50,
+        15: 127,  # Max DIRECTION (ascending)
+        20: 80, 21: 70, 22: 64, 23: 40,
+        24: 50, 25: 90, 26: 64, 27: 60
+    },
+    "descending": {
+        3: 50, 9: 50, 14: 50,
+        15: 0,    # Min DIRECTION (descending)
+        20: 80, 21: 70, 22: 64, 23: 40,
+        24: 50, 25: 90, 26: 64, 27: 60
+    },
+    "energetic": {
+        3: 90, 9: 40, 14: 80, 15: 64,
+        20: 40,
+        21: 127,  # Max ENERGY
+        22: 50, 23: 60,
+        24: 70, 25: 50, 26: 64, 27: 90
     }
+}
+
+# Presets never change, so their CC messages are encoded to raw bytes once at
+# import and loading a preset only sends
+PRESET_BYTES = {
+    name: tuple(bytes((0xB0, cc, value)) for cc, value in cc_values.items())
+    for name, cc_values in PRESETS.items()
+}
 
-    if preset_name not in presets:
+def performance_preset(port, preset_name):
+    """Load a performance preset (predefined parameter sets)"""
+    if preset_name not in PRESET_BYTES:
         print(f"Error: Unknown preset '{preset_name}'")
-        print(f"Available presets: {', '.join(presets.keys())}")
+        print(f"Available presets: {', '.join(PRESETS.keys())}")
         return
 
     print(f"Loading preset: {preset_name}")
-    set_parameters(port_name, presets[preset_name])
+    print("Setting parameters:")
+
+    send = raw_sender(port)
+    for data in PRESET_BYTES[preset_name]:
+        send(data)
+        _, cc_num, value = data
+        log(f"  CC {cc_num:3d} = {value:3d} ({value/127.0*100:.1f}%)")
+        time.sleep(0.1)
+
+    flush_log()
+    print("Done!")
+
+def run_command(port, command):
+    """
+    Run one interactive-mode command on an open port
+
+    Returns False when the command asks to quit. Malformed input, unknown
+    presets and out-of-range values raise ValueError so callers can report
+    the failure.
+    """
+    command = command.strip().lower()
 
-def interactive_mode(port_name):
+    if command in ['quit', 'exit', 'q']:
+        return False
+    elif command == 'help':
+        print("\nCC Mapping:")
+        for cc, name in CC_MAP.items():
+            print(f"  CC {cc:2d}: {name}")
+        print()
+    elif command.startswith('sweep '):
+        parts = command.split()
+        if len(parts) != 2:
+            raise ValueError("Invalid input. Use: sweep CC_NUMBER")
+        cc_num = int(parts[1])
+        sweep_parameter(port, cc_num, duration=2.0)
+    elif command.startswith('preset '):
+        preset = command.split(' ', 1)[1]
+        if preset not in PRESET_BYTES:
+            raise ValueError(f"Unknown preset '{preset}' "
+                             f"(available: {', '.join(PRESETS.keys())})")
+        performance_preset(port, preset)
+    else:
+        parts = command.split()
+        if len(parts) != 2:
+            raise ValueError("Invalid input. Use: CC_NUMBER VALUE")
+        cc_num = int(parts[0])
+        value = int(parts[1])
+        if not 0 <= value <= 127:
+            raise ValueError("Value must be 0-127")
+        name = CC_MAP.get(cc_num, f"CC {cc_num}")
+        print(f"Setting {name}:")
+        send_cc(port, cc_num, value)
+        flush_log()
+    return True
+
+def interactive_mode(port):
     """Interactive mode for manual CC control"""
     print("\nInteractive MIDI CC mode")
     print("Enter: CC_NUMBER VALUE (e.g., '3 64' sets MOTION to 50%)")
@@ -151,51 +289,39 @@ def interactive_mode(port_name):
     print("Or: 'preset NAME' to load preset")
     print("Type 'help' for CC mapping, 'quit' to exit\n")
 
-    cc_map = {
-        3: "MOTION", 9: "MEMORY", 14: "REGISTER", 15: "DIRECTION",
-        20: "PHRASE", 21: "ENERGY", 22: "STABILITY", 23: "FORGETFULNESS",
-        24: "LEAP SHAPE", 25: "DIRECTION MEMORY", 26: "HOME REGISTER", 27: "RANGE WIDTH"
-    }
-
-    with mido.open_output(port_name) as port:
-        while True:
-            try:
-                user_input = input("CC> ").strip().lower()
-
-                if user_input in ['quit', 'exit', 'q']:
-                    break
-                elif user_input == 'help':
-                    print("\nCC Mapping:")
-                    for cc, name in cc_map.items():
-                        print(f"  CC {cc:2d}: {name}")
-                    print()
-                elif user_input.startswith('sweep '):
-                    parts = user_input.split()
-                    if len(parts) == 2:
-                        cc_num = int(parts[1])
-                        sweep_parameter(port_name, cc_num, duration=2.0)
-                elif user_input.startswith('preset '):
-                    preset = user_input.split(' ', 1)[1]
-                    performance_preset(port_name, preset)
-                else:
-                    parts = user_input.split()
-                    if len(parts) == 2:
-                        cc_num = int(parts[0])
-                        value = int(parts[1])
-                        if 0 <= value <= 127:
-                            name = cc_map.get(cc_num, f"CC {cc_num}")
-                            print(f"Setting {name}:")
-                            send_cc(port, cc_num, value)
-                        else:
-                            print("Error: Value must be 0-127")
-                    else:
-                        print("Invalid input. Use: CC_NUMBER VALUE")
-
-            except (ValueError, KeyError) as e:
-                print(f"Error: {e}")
-            except KeyboardInterrupt:
-                print("\nExiting...")
+    while True:
+        try:
+            if not run_command(port, input("CC> ")):
                 break
+        except (ValueError, KeyError) as e:
+            print(f"Error: {e}")
+        except KeyboardInterrupt:
+            print("\nExiting...")
+            break
+
+def resolve_port_name(port_arg):
+    """Map a --port argument (name, index or None) to an output port name"""
+    if not port_arg:
+        ports = output_names()
+        if not ports:
+            print("Error: No MIDI output ports found!")
+            return None
+
+        print("No port specified. Available ports:")
+        list_midi_ports()
+        print("\nUsing first port by default...")
+        return ports[0]
+
+    # Check if port is an index or name
+    try:
+        port_idx = int(port_arg)
+    except ValueError:
+        return port_arg
+    ports = output_names()
+    if 0 <= port_idx < len(ports):
+        return ports[port_idx]
+    print(f"Error: Port index {port_idx} out of range")
+    return None
 
 def main():
     parser = argparse.ArgumentParser(description='MIDI CC test for GenerativeGenerator')
@@ -204,6 +330,8 @@ def main():
     parser.add_argument('-t', '--test-all', action='store_true', help='Test all 12 parameters')
     parser.add_argument('-s', '--sweep', type=int, metavar='CC', help='Sweep specified CC number')
     parser.add_argument('-d', '--duration', type=float, default=2.0, help='Sweep duration in seconds')
+    parser.add_argument('--hires', action='store_true',
+                       help='Sweep with 14-bit resolution (MSB + LSB on CC+32, CC 0-31 only)')
     parser.add_argument('-i', '--interactive', action='store_true', help='Interactive mode')
     parser.add_argument('--preset', type=str, help='Load performance preset')
     parser.add_argument('--set', nargs=2, action='append', metavar=('CC', 'VALUE'),
@@ -216,45 +344,30 @@ def main():
         list_midi_ports()
         return
 
-    # Determine port
-    if not args.port:
-        ports = mido.get_output_names()
-        if not ports:
-            print("Error: No MIDI output ports found!")
-            return
-
-        print("No port specified. Available ports:")
-        list_midi_ports()
-        print("\nUsing first port by default...")
-        port_name = ports[0]
-    else:
-        # Check if port is an index or name
-        try:
-            port_idx = int(args.port)
-            ports = mido.get_output_names()
-            if 0 <= port_idx < len(ports):
-                port_name = ports[port_idx]
-            else:
-                print(f"Error: Port index {port_idx} out of range")
-                return
-        except ValueError:
-            port_name = args.port
-
-    # Execute command
-    if args.test_all:
-        test_all_parameters(port_name)
-    elif args.sweep is not None:
-        sweep_parameter(port_name, args.sweep, args.duration)
-    elif args.preset:
-        performance_preset(port_name, args.preset)
-    elif args.set:
-        cc_values = {int(cc): int(val) for cc, val in args.set}
-        set_parameters(port_name, cc_values)
-    elif args.interactive:
-        interactive_mode(port_name)
-    else:
+    if not (args.test_all or args.sweep is not None or args.preset or args.set or args.interactive):
         print("No action specified. Use -h for help.")
         print("Quick start: --test-all, --interactive, or --preset smooth")
+        return
+
+    port_name = resolve_port_name(args.port)
+    if port_name is None:
+        return
+
+    # Open the port once; every command below reuses it
+    with mido.open_output(port_name) as port:
+        print(f"Connected to: {port_name}")
+
+        if args.test_all:
+            test_all_parameters(port)
+        elif args.sweep is not None:
+            sweep_parameter(port, args.sweep, args.duration, args.hires)
+        elif args.preset:
+            performance_preset(port, args.preset)
+        elif args.set:
+            cc_values = {int(cc): int(val) for cc, val in args.set}
+            set_parameters(port, cc_values)
+        elif args.interactive:
+            interactive_mode(port)
 
 if __name__ == '__main__':
     main()
@@ -7,116 +7,162 @@ Monitors MIDI output from Daisy Patch to verify note generation
 import mido
 import time
 import argparse
-from collections import Counter
-
-def monitor_midi(port_name, duration=None):
+import csv
+import sys
+from array import array
+from collections import Counter, namedtuple
+from operator import sub
+from midi_common import log, flush_log, input_names
+
+# Display names for all 128 MIDI notes, built once so the receive path is a
+# plain tuple index
+NOTE_NAMES = tuple(
+    mido.note_number_to_name(i) if hasattr(mido, 'note_number_to_name') else f"Note {i}"
+    for i in range(128)
+)
+
+# Note On capture as parallel arrays: float seconds since start, note, velocity
+Capture = namedtuple('Capture', ['timestamps', 'notes', 'velocities'])
+
+# Longest single wait in the main thread, in seconds
+WAIT_SLICE = 0.5
+
+# Longest histogram bar; rows slice this rather than building a new string
+BAR = "█" * 50
+
+def format_statistics(notes):
     """
-    Monitor MIDI messages from a port
+    Build the end-of-capture report for a sequence of Note On numbers
 
-    Args:
-        port_name: Name of MIDI input port
-        duration: Monitor duration in seconds (None = infinite)
+    Counter() and map() run their loops in C, and the direction split reads
+    the few distinct intervals rather than every interval three times over.
     """
-    try:
-        with mido.open_input(port_name) as port:
-            print(f"Monitoring MIDI from: {port_name}")
-            print("Press Ctrl+C to stop\n")
+    note_counter = Counter(notes)
+    interval_list = list(map(sub, notes[1:], notes[:-1]))
 
-            start_time = time.time()
-            note_counter = Counter()
-            interval_list = []
-            last_note = None
+    lines = ["\n" + "="*60 + "\n", "STATISTICS\n", "="*60 + "\n"]
 
-            try:
-                while True:
-                    msg = port.poll()
+    lines.append(f"\nTotal notes received: {len(notes)}\n")
 
-                    if msg:
-                        timestamp = time.time() - start_time
+    lines.append("\nNote frequency:\n")
+    for note, count in note_counter.most_common():
+        lines.append(f"  {note:3d} ({NOTE_NAMES[note]:>4s}): {count:3d} {BAR[:min(count, 50)]}\n")
 
-                        if msg.type == 'note_on':
-                            note = msg.note
-                            velocity = msg.velocity
+    if interval_list:
+        lines.append("\nInterval statistics:\n")
+        interval_counter = Counter(interval_list)
+        for interval, count in sorted(interval_counter.items(), key=lambda x: abs(x[0])):
+            direction = "↑" if interval > 0 else "↓" if interval < 0 else "="
+            lines.append(f"  {direction}{abs(interval):2d}st: {count:3d} {BAR[:min(count, 30)]}\n")
 
-                            # Calculate interval from last note
-                            interval_str = ""
-                            if last_note is not None:
-                                interval = note - last_note
-                                interval_list.append(interval)
-                                direction = "↑" if interval > 0 else "↓" if interval < 0 else "="
-                                interval_str = f" [{direction}{abs(interval)}st]"
+        # Direction stats
+        ascending = sum(count for interval, count in interval_counter.items() if interval > 0)
+        descending = sum(count for interval, count in interval_counter.items() if interval < 0)
+        repeats = interval_counter[0]
 
-                            note_name = mido.note_number_to_name(note) if hasattr(mido, 'note_number_to_name') else f"Note {note}"
-                            print(f"[{timestamp:6.2f}s] Note On:  {note:3d} ({note_name:>4s}) vel={velocity:3d}{interval_str}")
+        lines.append("\nDirection:\n")
+        lines.append(f"  Ascending:  {ascending:3d} ({100*ascending/len(interval_list):.1f}%)\n")
+        lines.append(f"  Descending: {descending:3d} ({100*descending/len(interval_list):.1f}%)\n")
+        lines.append(f"  Repeats:    {repeats:3d} ({100*repeats/len(interval_list):.1f}%)\n")
 
-                            note_counter[note] += 1
-                            last_note = note
+        # Range
+        low, high = min(note_counter), max(note_counter)
+        lines.append(f"\nPitch range: {low} to {high} ({high - low} semitones)\n")
 
-                        elif msg.type == 'note_off':
-                            note = msg.note
-                            note_name = mido.note_number_to_name(note) if hasattr(mido, 'note_number_to_name') else f"Note {note}"
-                            print(f"[{timestamp:6.2f}s] Note Off: {note:3d} ({note_name:>4s})")
+    return ''.join(lines)
 
-                        elif msg.type == 'clock':
-                            pass  # Don't spam with clock messages
-                        else:
-                            print(f"[{timestamp:6.2f}s] {msg.type}: {msg}")
+def save_capture(capture, path):
+    """Write a capture to CSV with a timestamp,note,velocity header"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'note', 'velocity'])
+        writer.writerows((f"{t:.6f}", n, v) for t, n, v in zip(*capture))
 
-                    # Check duration
-                    if duration and (time.time() - start_time) > duration:
-                        break
+def monitor_midi(port_name, duration=None):
+    """
+    Monitor MIDI messages from a port
 
-                    time.sleep(0.001)  # Small sleep to prevent CPU spinning
+    Args:
+        port_name: Name of MIDI input port
+        duration: Monitor duration in seconds (None = infinite)
+
+    Returns:
+        Capture of every Note On received, or None if the port can't be opened
+    """
+    start_time = time.time()
+    # Received Note Ons in arrival order as packed parallel arrays.
+    # Statistics are derived from these once capture ends.
+    timestamps = array('d')
+    notes = array('B')
+    velocities = array('B')
+
+    def on_message(msg):
+        # Runs on the rtmidi input thread, which sleeps until a message
+        # arrives. Only this thread touches the capture buffers while the port
+        # is open; they are read once the port has been closed.
+        timestamp = time.time() - start_time
+
+        if msg.type == 'note_on':
+            note = msg.note
+            velocity = msg.velocity
+
+            # Calculate interval from last note
+            interval_str = ""
+            if notes:
+                interval = note - notes[-1]
+                direction = "↑" if interval > 0 else "↓" if interval < 0 else "="
+                interval_str = f" [{direction}{abs(interval)}st]"
+
+            note_name = NOTE_NAMES[note]
+            log(f"[{timestamp:6.2f}s] Note On:  {note:3d} ({note_name:>4s}) vel={velocity:3d}{interval_str}")
+
+            timestamps.append(timestamp)
+            notes.append(note)
+            velocities.append(velocity)
+
+        elif msg.type == 'note_off':
+            note = msg.note
+            note_name = NOTE_NAMES[note]
+            log(f"[{timestamp:6.2f}s] Note Off: {note:3d} ({note_name:>4s})")
+
+        elif msg.type == 'clock':
+            pass  # Don't spam with clock messages
+        else:
+            log(f"[{timestamp:6.2f}s] {msg.type}: {msg}")
 
+    try:
+        with mido.open_input(port_name, callback=on_message):
+            log(f"Monitoring MIDI from: {port_name}")
+            log("Press Ctrl+C to stop\n")
+
+            # Nothing to poll: messages are pushed to on_message, so the main
+            # thread just sleeps until the duration expires or Ctrl+C. Sleeps
+            # are capped at WAIT_SLICE so Ctrl+C is noticed promptly on every
+            # platform.
+            end = time.monotonic() + duration if duration else float('inf')
+            try:
+                while (remaining := end - time.monotonic()) > 0:
+                    time.sleep(min(remaining, WAIT_SLICE))
             except KeyboardInterrupt:
-                print("\n\nMonitoring stopped by user")
-
-            # Print statistics
-            if note_counter:
-                print("\n" + "="*60)
-                print("STATISTICS")
-                print("="*60)
-
-                print(f"\nTotal notes received: {sum(note_counter.values())}")
-
-                print("\nNote frequency:")
-                for note, count in note_counter.most_common():
-                    note_name = mido.note_number_to_name(note) if hasattr(mido, 'note_number_to_name') else f"Note {note}"
-                    bar = "█" * min(count, 50)
-                    print(f"  {note:3d} ({note_name:>4s}): {count:3d} {bar}")
-
-                if interval_list:
-                    print("\nInterval statistics:")
-                    interval_counter = Counter(interval_list)
-                    for interval, count in sorted(interval_counter.items(), key=lambda x: abs(x[0])):
-                        direction = "↑" if interval > 0 else "↓" if interval < 0 else "="
-                        bar = "█" * min(count, 30)
-                        print(f"  {direction}{abs(interval):2d}st: {count:3d} {bar}")
-
-                    # Direction stats
-                    ascending = sum(1 for i in interval_list if i > 0)
-                    descending = sum(1 for i in interval_list if i < 0)
-                    repeats = sum(1 for i in interval_list if i == 0)
-
-                    print(f"\nDirection:")
-                    print(f"  Ascending:  {ascending:3d} ({100*ascending/len(interval_list):.1f}%)")
-                    print(f"  Descending: {descending:3d} ({100*descending/len(interval_list):.1f}%)")
-                    print(f"  Repeats:    {repeats:3d} ({100*repeats/len(interval_list):.1f}%)")
-
-                    # Range
-                    print(f"\nPitch range: {min(note_counter.keys())} to {max(note_counter.keys())} ({max(note_counter.keys()) - min(note_counter.keys())} semitones)")
+                log("\n\nMonitoring stopped by user")
+
+        flush_log()
+
+        # One write for the whole report instead of a print per row
+        if notes:
+            sys.stdout.write(format_statistics(notes))
 
     except IOError as e:
         print(f"Error: Could not open MIDI port '{port_name}'")
         print(f"Details: {e}")
-        return False
+        return None
 
-    return True
+    return Capture(timestamps, notes, velocities)
 
 def list_midi_ports():
     """List available MIDI input ports"""
     print("Available MIDI input ports:")
-    for i, port in enumerate(mido.get_input_names()):
+    for i, port in enumerate(input_names()):
         print(f"  {i}: {port}")
 
 def main():
@@ -124,6 +170,8 @@ def main():
     parser.add_argument('-l', '--list', action='store_true', help='List available MIDI ports')
     parser.add_argument('-p', '--port', type=str, help='MIDI port name (or index)')
     parser.add_argument('-d', '--duration', type=float, help='Monitor duration in seconds (default: infinite)')
+    parser.add_argument('-o', '--save', type=str, metavar='FILE',
+                       help='Save received Note Ons to a CSV file (timestamp,note,velocity)')
 
     args = parser.parse_args()
 
@@ -134,7 +182,7 @@ def main():
 
     # Determine port
     if not args.port:
-        ports = mido.get_input_names()
+        ports = input_names()
         if not ports:
             print("Error: No MIDI input ports found!")
             return
@@ -147,7 +195,7 @@ def main():
         # Check if port is an index or name
         try:
             port_idx = int(args.port)
-            ports = mido.get_input_names()
+            ports = input_names()
             if 0 <= port_idx < len(ports):
                 port_name = ports[port_idx]
             else:
@@ -157,7 +205,11 @@ def main():
             port_name = args.port
 
     # Monitor
-    monitor_midi(port_name, args.duration)
+    capture = monitor_midi(port_name, args.duration)
+
+    if capture and args.save:
+        save_capture(capture, args.save)
+        print(f"\nSaved {len(capture.notes)} notes to {args.save}")
 
 if __name__ == '__main__':
     main()